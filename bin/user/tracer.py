@@ -12,7 +12,9 @@ default serial settings: 115200-8-1-N
 use sudo when running, otherwise you will get this exception:
   engine: Unable to load driver: 'NoneType' object has no attribute 'interCharTimeout'
 
-pip install pymodbus
+pip install "pymodbus>=1.5,<3"
+
+pymodbus 3 moved the synchronous client, so it will not work.
 
 Credits
 
@@ -23,17 +25,39 @@ Thanks to lewismoten for publishing a pymodbus implementation:
 # TODO: enable get/set time
 
 from pymodbus.client.sync import ModbusSerialClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from pymodbus.framer.rtu_framer import ModbusRtuFramer
 from pymodbus.mei_message import ReadDeviceInformationRequest
 from pymodbus.constants import DeviceInformation
+from pymodbus.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.register_read_message import ReadInputRegistersResponse
 
-import ctypes
+import array
 import datetime
+import fcntl
+import os
+import struct
 import syslog
+import threading
 import time
+import traceback
+
+try:
+    import queue
+except ImportError:
+    # python 2
+    import Queue as queue
+
+try:
+    from time import monotonic
+except ImportError:
+    # python 2 has no monotonic clock in the standard library
+    from time import time as monotonic
 
 import weewx
 import weewx.drivers
 import weewx.units
+from weeutil.weeutil import tobool
 
 DRIVER_NAME = 'Tracer'
 DRIVER_VERSION = '0.2'
@@ -42,8 +66,10 @@ DRIVER_VERSION = '0.2'
 def logmsg(dst, msg):
     syslog.syslog(dst, 'Tracer: %s' % msg)
 
-def logdbg(msg):
-    logmsg(syslog.LOG_DEBUG, msg)
+def logdbg(msg, *args):
+    # format only if debug messages will actually be logged
+    if debug_enabled():
+        logmsg(syslog.LOG_DEBUG, msg % args if args else msg)
 
 def loginf(msg):
     logmsg(syslog.LOG_INFO, msg)
@@ -54,6 +80,10 @@ def logcrt(msg):
 def logerr(msg):
     logmsg(syslog.LOG_ERR, msg)
 
+def debug_enabled():
+    # a mask of 0 returns the current mask without changing it
+    return syslog.setlogmask(0) & syslog.LOG_MASK(syslog.LOG_DEBUG)
+
 
 def loader(config_dict, _):
     return TracerDriver(**config_dict[DRIVER_NAME])
@@ -76,7 +106,7 @@ schema = [('dateTime',   'INTEGER NOT NULL UNIQUE PRIMARY KEY'),
 weewx.units.obs_group_dict['ambient_temperature'] = 'group_temperature'
 weewx.units.obs_group_dict['battery_temperature'] = 'group_temperature'
 weewx.units.obs_group_dict['battery_current'] = 'group_amp'
-weewx.units.obs_group_dict['battery_current'] = 'group_volt'
+weewx.units.obs_group_dict['battery_voltage'] = 'group_volt'
 weewx.units.obs_group_dict['consumed_energy'] = 'group_energy' # watt-hour
 weewx.units.obs_group_dict['generated_energy'] = 'group_energy' # watt-hour
 try:
@@ -86,98 +116,314 @@ except AttributeError:
         pass
 
 
-BATTERY_TYPES = {
-    0: "user defined",
-    1: "sealed",
-    2: "gel",
-    3: "flooded",
-}
-LOAD_CONTROLLING_MODES = {
-    0: "manual control",
-    1: "light on/off",
-    2: "light on+ timer",
-    3: "time control",
-}
-VOLTAGE_CODES = {
-    0: "auto recognize",
-    1: "12V",
-    2: "24V",
-}
-LOAD_TIMING_CONTROL_SELECTION = {
-    0: "using timer 1",
-    1: "using timer 2",
-}
-MANAGEMENT_MODES = {
-    0: "voltage compensation",
-    1: "SOC",
-}
-YES_NO = {
-    0: "no",
-    1: "yes",
-}
-ON_OFF = {
-    0: "off",
-    1: "on",
-}
-
+# names for enumerated register values, indexed by value
+BATTERY_TYPES = (
+    "user defined",
+    "sealed",
+    "gel",
+    "flooded",
+)
+LOAD_CONTROLLING_MODES = (
+    "manual control",
+    "light on/off",
+    "light on+ timer",
+    "time control",
+)
+VOLTAGE_CODES = (
+    "auto recognize",
+    "12V",
+    "24V",
+)
+LOAD_TIMING_CONTROL_SELECTION = (
+    "using timer 1",
+    "using timer 2",
+)
+MANAGEMENT_MODES = (
+    "voltage compensation",
+    "SOC",
+)
+YES_NO = (
+    "no",
+    "yes",
+)
+ON_OFF = (
+    "off",
+    "on",
+)
+
+CLOCK_REGISTERS = struct.Struct('>HHH')
+CLOCK_BYTES = struct.Struct('>6B')
+
+# sign extension without branches.  the masks keep out-of-range input from
+# a bad read within the register width.
+def signed16(value):
+    return ((value & 0xFFFF) ^ 0x8000) - 0x8000
 def value32(lo, hi):
-    return ctypes.c_int(lo + (hi << 16)).value / 100
+    x = (lo & 0xFFFF) | ((hi & 0xFFFF) << 16)
+    return ((x ^ 0x80000000) - 0x80000000) / 100.0
 def value16(value):
-    return ctypes.c_short(value).value / 100
-def value8(value):
-    return [value >> 8, value & 0xFF]
-def volts(x):
-    return value16(x)
-def watts(lo, hi):
-    return value32(lo, hi)
-def kwh(lo, hi):
-    return value32(lo, hi)
+    return signed16(value) / 100.0
+def unscaled(x):
+    return x
 def amps(lo, hi=None):
     if hi is not None:
         return value32(lo, hi)
     return value16(lo)
-def amp_hours(x):
-    return x
-def milliohms(x):
-    return value16(x)
-def temperature(x):
-    return value16(x) # degree C
-def percent(x):
-    return value16(x) * 100
-def tons(lo, hi):
-    return value32(lo, hi)
-def coeff(x):
-    return value16(x)
+# most decoders are just a scaling, so use the scaling function directly and
+# avoid a second function call for every field
+volts = value16
+watts = value32
+kwh = value32
+amp_hours = unscaled
+milliohms = value16
+temperature = value16 # degree C
+percent = signed16
+tons = value32
+coeff = value16
+charging_mode = unscaled
 def battery_type(x):
-    return BATTERY_TYPES.get(x, x)
+    return BATTERY_TYPES[x] if 0 <= x < len(BATTERY_TYPES) else x
 def load_controlling_mode(x):
-    return LOAD_CONTROLLING_MODES.get(x, x)
+    return LOAD_CONTROLLING_MODES[x] if 0 <= x < len(LOAD_CONTROLLING_MODES) else x
 def voltage_code(x):
-    return VOLTAGE_CODES.get(x, x)
+    return VOLTAGE_CODES[x] if 0 <= x < len(VOLTAGE_CODES) else x
 def load_timing_control(x):
-    return LOAD_TIMING_CONTROL_SELECTION.get(x, x)
+    return LOAD_TIMING_CONTROL_SELECTION[x] if 0 <= x < len(LOAD_TIMING_CONTROL_SELECTION) else x
 def management_mode(x):
-    return MANAGEMENT_MODES.get(x, x)
+    return MANAGEMENT_MODES[x] if 0 <= x < len(MANAGEMENT_MODES) else x
+# a bad read can hold an impossible time, which should not fail the whole
+# query, so these return None for values that are out of range
 def to_time(second, minute, hour):
-    return datetime.time(hour, minute, second)
+    try:
+        return datetime.time(hour, minute, second)
+    except ValueError:
+        return None
 def to_datetime(second_minute, hour_day, month_year):
-    sm = value8(second_minute)
-    hd = value8(hour_day)
-    my = value8(month_year)
-    return datetime.datetime(2000 + my[0], my[1], hd[0], hd[1], sm[0], sm[1])
-def days(x):
-    return x
-def minutes(x):
-    return x
-def seconds(x):
-    return x
+    # each register holds two fields, one in each byte
+    minute, second, day, hour, year, month = CLOCK_BYTES.unpack(
+        CLOCK_REGISTERS.pack(second_minute, hour_day, month_year))
+    try:
+        return datetime.datetime(2000 + year, month, day, hour, minute, second)
+    except ValueError:
+        return None
+days = unscaled
+minutes = unscaled
+seconds = unscaled
 def hour_minute(x):
-    hm = value8(x)
-    return "%s:%s" % (hm[0], hm[1])
+    return "%d:%02d" % ((x >> 8) & 0xFF, x & 0xFF)
 def yes_no(x):
-    return YES_NO.get(x, x)
+    return YES_NO[x] if 0 <= x < len(YES_NO) else x
 def on_off(x):
-    return ON_OFF.get(x, x)
+    return ON_OFF[x] if 0 <= x < len(ON_OFF) else x
+
+def compile_schema(schema):
+    # resolve the field offsets once.  each block becomes (address, count,
+    # plan), where plan is (names, decoders) and a decoder is (fn, start, end)
+    compiled = []
+    for addr, fields in schema:
+        names = []
+        decoders = []
+        i = 0
+        for f in fields:
+            n = f[2] if len(f) > 2 else 1
+            if f[0] is not None:
+                names.append(f[0])
+                decoders.append((f[1], i, i + n))
+            i += n
+        compiled.append((addr, i, (tuple(names), tuple(decoders))))
+    return compiled
+
+def decode_block(plan, registers):
+    names, decoders = plan
+    return dict(zip(names, [fn(*registers[start:end])
+                            for fn, start, end in decoders]))
+
+
+# bit fields in the status registers at 0x3200, as (name, register offset,
+# shift, mask)
+STATUS_FIELDS = (
+    ('status_battery_voltage', 0, 0, 0x0007),
+    ('status_battery_temperature', 0, 4, 0x000f),
+    ('status_battery_resistance', 0, 8, 0x0001),
+    ('status_battery_rated_voltage', 0, 15, 0x0001),
+    ('status_charge_input_voltage', 1, 14, 0x0003),
+    ('status_charge_mosfet_short', 1, 13, 0x0001),
+    ('status_charge_charging_or_anti_reverse_mosfet_short', 1, 12, 0x0001),
+    ('status_charge_anti_reverse_mosfet_short', 1, 11, 0x0001),
+    ('status_charge_input_over_current', 1, 10, 0x0001),
+    ('status_charge_load_over_current', 1, 9, 0x0001),
+    ('status_charge_load_short', 1, 8, 0x0001),
+    ('status_charge_load_mosfet_short', 1, 7, 0x0001),
+    ('status_charge_pv_input_short', 1, 4, 0x0001),
+    ('status_charge_battery', 1, 2, 0x0003),
+    ('status_charge_fault', 1, 1, 0x0001),
+    ('status_charge_running', 1, 0, 0x0001),
+    ('status_discharge_input_voltage', 2, 14, 0x0003),
+    ('status_discharge_output_power', 2, 12, 0x0003),
+    ('status_discharge_short_circuit', 2, 11, 0x0001),
+    ('status_discharge_unable_to_discharge', 2, 10, 0x0001),
+    ('status_discharge_unable_to_stop_discharge', 2, 9, 0x0001),
+    ('status_discharge_output_voltage_abnormal', 2, 8, 0x0001),
+    ('status_discharge_input_overpressure', 2, 7, 0x0001),
+    ('status_discharge_high_voltage_side_short', 2, 6, 0x0001),
+    ('status_discharge_boost_overpressure', 2, 5, 0x0001),
+    ('status_discharge_output_overpressure', 2, 4, 0x0001),
+    ('status_discharge_fault', 2, 1, 0x0001),
+    ('status_discharge_running', 2, 0, 0x0001),
+)
+STATUS_NAMES = tuple(f[0] for f in STATUS_FIELDS)
+STATUS_BITS = tuple(f[1:] for f in STATUS_FIELDS)
+
+# coils, as (name, address)
+COILS = (
+    ('manual_load_control', 2),
+    ('default_load_control', 3),
+    ('load_test_mode', 5),
+    ('force_loa', 6),
+)
+
+def decode_coils(start, count, bits):
+    # bits are padded to a whole byte, so use count, not len(bits)
+    return dict((name, bits[addr - start]) for name, addr in COILS
+                if start <= addr < start + count)
+
+# each schema is a list of blocks of registers.  each block is the address of
+# its first register and a list of fields.  each field is a name, a decoder,
+# and the number of registers passed to the decoder if more than one.  a field
+# without a name is a register that is skipped.  the schemas are compiled
+# when the module is loaded.
+
+# input registers with the ratings of the device
+RATINGS_SCHEMA = compile_schema([
+    (0x3000, [
+        ('rated_input_voltage', volts),
+        ('rated_input_current', amps),
+        ('rated_input_power', watts, 2),
+        ('rated_output_voltage', volts),
+        ('rated_output_current', amps),
+        ('rated_output_power', watts, 2),
+        ('charging_mode', charging_mode),
+    ]),
+    (0x300E, [
+        ('rated_output_current_of_load', amps),
+    ]),
+])
+
+# input registers with real-time data
+DATA_SCHEMA = compile_schema([
+    (0x3100, [
+        ('charge_input_voltage', volts),
+        ('charge_input_current', amps),
+        ('charge_input_power', watts, 2),
+        ('charge_output_voltage', volts),
+        ('charge_output_current', amps),
+        ('charge_output_power', watts, 2),
+        (None, None, 4),
+        ('discharge_output_voltage', volts),
+        ('discharge_output_current', amps),
+        ('discharge_output_power', watts, 2),
+        ('battery_temperature', temperature),
+        ('equipment_temperature', temperature),
+        ('component_temperature', temperature),
+    ]),
+    (0x311A, [
+        ('battery_soc', percent),
+        ('remote_battery_temperature', temperature),
+    ]),
+    (0x311D, [
+        ('battery_rated_power', volts),
+    ]),
+])
+
+# input registers with statistics
+STATISTICS_SCHEMA = compile_schema([
+    (0x3300, [
+        ('input_voltage_today_max', volts),
+        ('input_voltage_today_min', volts),
+        ('battery_voltage_today_max', volts),
+        ('battery_voltage_today_min', volts),
+        ('consumed_energy_today', kwh, 2),
+        ('consumed_energy_month', kwh, 2),
+        ('consumed_energy_year', kwh, 2),
+        ('consumed_energy_total', kwh, 2),
+        ('generated_energy_today', kwh, 2),
+        ('generated_energy_month', kwh, 2),
+        ('generated_energy_year', kwh, 2),
+        ('generated_energy_total', kwh, 2),
+        ('co2_reduction', tons, 2),
+        (None, None, 4),
+        ('battery_voltage', volts),
+        ('battery_current', amps, 2),
+        ('battery_temperature', temperature),
+        ('ambient_temperature', temperature),
+    ]),
+])
+
+# holding registers with the settings
+SETTINGS_SCHEMA = compile_schema([
+    (0x9000, [
+        ('battery_type', battery_type),
+        ('battery_capacity', amp_hours),
+        ('temperature_compensation_coefficient', coeff),
+        ('high_voltage_disconnect', volts),
+        ('charging_limit_voltage', volts),
+        ('over_voltage_reconnect', volts),
+        ('equalization_voltage', volts),
+        ('boost_voltage', volts),
+        ('float_voltage', volts),
+        ('boost_reconnect_voltage', volts),
+        ('low_voltage_reconnect', volts),
+        ('under_voltage_recover', volts),
+        ('under_voltage_warning', volts),
+        ('low_voltage_disconnect', volts),
+        ('discharging_limit_voltage', volts),
+    ]),
+    (0x9013, [
+        ('clock', to_datetime, 3),
+        ('equalization_charging_cycle', days),
+        ('battery_temperature_warning_upper_limit', temperature),
+        ('battery_temperature_warning_lower_limit', temperature),
+        ('controller_inner_temperature_upper_limit', temperature),
+        ('controller_inner_temperature_upper_limit_recover', temperature),
+        ('power_component_temperature_upper_limit', temperature),
+        ('power_component_temperature_upper_limit_recover', temperature),
+        ('line_impedance', milliohms),
+        ('night_time_threshold_volt', volts),
+        ('light_signal_startup_delay_time', minutes),
+        ('day_time_threshold_volt', volts),
+        ('light_signal_turn_off_delay_time', minutes),
+    ]),
+    (0x903D, [
+        ('load_controlling_modes', load_controlling_mode),
+        ('working_time_length_1', hour_minute),
+        ('working_time_length_2', hour_minute),
+    ]),
+    (0x9042, [
+        ('turn_on_timing_1', to_time, 3),
+        ('turn_off_timing_1', to_time, 3),
+        ('turn_on_timing_2', to_time, 3),
+        ('turn_off_timing_2', to_time, 3),
+    ]),
+    (0x9063, [
+        ('backlight_time', seconds),
+    ]),
+    (0x9065, [
+        ('length_of_night', hour_minute),
+    ]),
+    (0x9067, [
+        ('battery_rated_voltage_code', voltage_code),
+        (None, None),
+        ('load_timing_control_selection', load_timing_control),
+        ('default_load_onoff_in_manual_mode', on_off),
+        ('equalize_duration', minutes),
+        ('boost_duration', minutes),
+        ('discharge_percentage', percent),
+        ('charging_percentage', percent),
+    ]),
+    (0x9070, [
+        ('management_modes', management_mode),
+    ]),
+])
 
 
 class TracerConfEditor(weewx.drivers.AbstractConfEditor):
@@ -219,6 +465,11 @@ class TracerDriver(weewx.drivers.AbstractDevice):
         'generated_energy': 'generated_energy_total',
         'generated_energy_today': 'generated_energy_today',
     }
+    # queries made on every poll
+    QUERIES = ['get_data', 'get_statistics']
+    # number of polls to hold while weewx is busy.  when it is full, the
+    # oldest poll is dropped.
+    QUEUE_SIZE = 4
 
     def __init__(self, **stn_dict):
         loginf('driver version is %s' % DRIVER_VERSION)
@@ -227,56 +478,193 @@ class TracerDriver(weewx.drivers.AbstractDevice):
         port = stn_dict.get('port', Tracer.DEFAULT_PORT)
         loginf("port is %s" % port)
         baud_rate = int(stn_dict.get('baud_rate', Tracer.DEFAULT_BAUD_RATE))
-        timeout = int(stn_dict.get('timeout', Tracer.DEFAULT_TIMEOUT))
+        timeout = float(stn_dict.get('timeout', Tracer.DEFAULT_TIMEOUT))
         self.poll_interval = int(stn_dict.get('poll_interval', 10))
         loginf("poll interval is %s" % self.poll_interval)
         self.sensor_map = dict(TracerDriver.DEFAULT_MAP)
         if 'sensor_map' in stn_dict:
             self.sensor_map.update(stn_dict['sensor_map'])
         loginf("sensor map: %s" % self.sensor_map)
+        self._sensor_items = tuple(self.sensor_map.items())
         self.max_tries = int(stn_dict.get('max_tries', 3))
         self.retry_wait = int(stn_dict.get('retry_wait', 5))
-        self.station = Tracer(port, baud_rate, timeout)
+        self._poll_time = None
+        low_latency = tobool(stn_dict.get('low_latency', True))
+        loginf("low latency mode is %s" % low_latency)
+        self.station = Tracer(port, baud_rate, timeout, low_latency)
         if not self.station.connect():
             raise weewx.WeeWxIOError("cannot connect to device")
         loginf('device info: %s' % self.station.get_info())
+        # read the device in a separate thread, so that the polling schedule
+        # is not held up while weewx is processing packets
+        self._queue = queue.Queue(maxsize=TracerDriver.QUEUE_SIZE)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll_device)
+        self._thread.daemon = True
+        self._thread.start()
 
     @property
     def hardware_name(self):
         return self.model
 
     def closePort(self):
+        self._stop.set()
+        self._thread.join()
         self.station.close()
         self.station = None
 
     def genLoopPackets(self):
         while True:
-            data = dict()
-            data.update(self._get_with_retries('get_data'))
-            data.update(self._get_with_retries('get_statistics'))
-            logdbg("raw data: %s" % data)
+            try:
+                ts, data = self._queue.get(True, 1)
+            except queue.Empty:
+                if not self._thread.is_alive():
+                    raise weewx.WeeWxIOError("polling thread stopped")
+                continue
+            if isinstance(data, Exception):
+                raise data
+            logdbg("raw data: %s", data)
             pkt = {
-                'dateTime': int(time.time() + 0.5),
+                'dateTime': int(ts + 0.5),
                 'usUnits': weewx.METRIC,
             }
-            for k in self.sensor_map:
-                if self.sensor_map[k] in data:
-                    pkt[k] = data[self.sensor_map[k]]
+            pkt.update((k, data[v]) for k, v in self._sensor_items if v in data)
             yield pkt
+
+    def _poll_device(self):
+        # read on a fixed schedule and queue the data with its read time.
+        # on any error, queue the error and stop.
+        deadline = monotonic()
+        warned = False
+        while not self._stop.is_set():
+            start = monotonic()
+            try:
+                data = self._poll()
+            except Exception as e:
+                if not isinstance(e, weewx.WeeWxIOError):
+                    # raising it again in genLoopPackets loses the traceback
+                    for line in traceback.format_exc().splitlines():
+                        logerr(line)
+                # genLoopPackets raises it, as if the read had been made there
+                self._put((time.time(), e))
+                return
+            self._put((time.time(), data))
+            # keep a moving average of how long a poll takes
+            elapsed = monotonic() - start
+            if self._poll_time is None:
+                self._poll_time = elapsed
+            else:
+                self._poll_time = 0.9 * self._poll_time + 0.1 * elapsed
             if self.poll_interval:
-                time.sleep(self.poll_interval)
+                # do not poll faster than the serial link can keep up with
+                interval = max(self.poll_interval, 2 * self._poll_time)
+                if interval > self.poll_interval and not warned:
+                    loginf("poll_interval %s is too short, polls take %.2fs;"
+                           " using %.2fs" %
+                           (self.poll_interval, self._poll_time, interval))
+                    warned = True
+                # poll on a fixed schedule, so the time spent reading the
+                # device does not accumulate as drift
+                deadline += interval
+                delay = deadline - monotonic()
+                if delay > interval:
+                    # the clock went back, which time.time can do on python
+                    # 2, so start a new schedule instead of waiting it out
+                    deadline = monotonic() + interval
+                if delay > 0:
+                    self._stop.wait(min(delay, interval))
+                elif delay < -interval:
+                    # more than a poll behind, so start a new schedule
+                    deadline = monotonic()
+
+    def _poll(self):
+        # each query returns a new dict, so collect into the first one
+        queries = TracerDriver.QUERIES
+        data = self._get_with_retries(queries[0])
+        for method in queries[1:]:
+            data.update(self._get_with_retries(method))
+        return data
+
+    def _put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
 
     def _get_with_retries(self, method):
+        get = getattr(self.station, method)
+        last_exc = None
         for n in range(self.max_tries):
             try:
-                return getattr(self.station, method)()
-            except (IOError, ValueError, TypeError) as e:
-                loginf("failed attempt %s of %s: %s" %
-                       (n + 1, self.max_tries, e))
-                time.sleep(self.retry_wait)
+                return get()
+            except (ConnectionException, ModbusIOException,
+                    IOError, ValueError, TypeError) as e:
+                last_exc = e
+                logdbg("failed attempt %s of %s: %s",
+                       n + 1, self.max_tries, e)
+                if n + 1 < self.max_tries:
+                    if isinstance(e, ConnectionException) or n >= 1:
+                        # start over with a fresh port, in case the serial
+                        # or transaction state is wedged
+                        self._reconnect()
+                    # most failures are a garbled frame, so retry quickly at
+                    # first, then back off
+                    time.sleep(min(self.retry_wait, 0.05 * 2 ** n))
+        raise weewx.WeeWxIOError("%s: max tries %s exceeded: %s" %
+                                 (method, self.max_tries, last_exc))
+
+    def _reconnect(self):
+        self.station.close()
+        try:
+            self.station.connect()
+        except Exception as e:
+            # the next request will try to open the port again
+            logdbg("reconnect failed: %s", e)
+
+
+# pymodbus unpacks the registers one at a time, so unpack them all at once
+class UnpackRegistersMixin(object):
+
+    def decode(self, data):
+        n = struct.unpack_from('>B', data)[0] // 2
+        self.registers = list(struct.unpack_from('>%dH' % n, data, 1))
+
+
+class HoldingRegistersResponse(UnpackRegistersMixin,
+                               ReadHoldingRegistersResponse):
+    pass
+
+
+class InputRegistersResponse(UnpackRegistersMixin,
+                             ReadInputRegistersResponse):
+    pass
+
+
+# the same few read requests are sent over and over, so keep the frame and
+# crc for each one.  other requests, such as writes, are framed as usual.
+class CachingRtuFramer(ModbusRtuFramer):
+    READ_FUNCTION_CODES = (0x01, 0x02, 0x03, 0x04)
+
+    def __init__(self, decoder, client=None):
+        super(CachingRtuFramer, self).__init__(decoder, client)
+        self._frames = dict()
+
+    def buildPacket(self, message):
+        if message.function_code not in CachingRtuFramer.READ_FUNCTION_CODES:
+            return super(CachingRtuFramer, self).buildPacket(message)
+        key = (message.unit_id, message.function_code, message.encode())
+        packet = self._frames.get(key)
+        if packet is None:
+            packet = super(CachingRtuFramer, self).buildPacket(message)
+            self._frames[key] = packet
         else:
-            raise weewx.WeeWxIOError("%s: max tries %s exceeded" %
-                                     (method, self.max_tries))
+            message.transaction_id = message.unit_id
+        return packet
 
 
 class Tracer(ModbusSerialClient):
@@ -284,321 +672,232 @@ class Tracer(ModbusSerialClient):
     DEFAULT_PORT = '/dev/ttyUSB0'
     DEFAULT_BAUD_RATE = 115200
     DEFAULT_TIMEOUT = 1 # seconds
-
-    def __init__(self, port, baud_rate, timeout):
+    # a timeout of 0 would make serial reads return without waiting
+    MIN_TIMEOUT = 0.05 # seconds
+    # from linux serial.h, for enabling low latency mode
+    TIOCGSERIAL = 0x541E
+    TIOCSSERIAL = 0x541F
+    ASYNC_LOW_LATENCY = 0x2000
+    # modbus limit on the number of registers in a single read
+    MAX_READ_COUNT = 125
+    # the settings rarely change, so reuse them for this long, in seconds
+    SETTINGS_CACHE_TTL = 3600
+
+    def __init__(self, port, baud_rate, timeout, low_latency=True):
+        # pymodbus flushes stale input before each request and reads only
+        # the expected response length, so the timeout matters only when the
+        # device does not answer.  a short timeout makes those failures fast.
+        timeout = max(timeout, Tracer.MIN_TIMEOUT)
+        # the driver does its own retries, so do not let pymodbus retry too
         super(Tracer, self).__init__(method='rtu', port=port,
-                                     baudrate=baud_rate, timeout=timeout)
+                                     baudrate=baud_rate, timeout=timeout,
+                                     retries=1, retry_on_empty=False,
+                                     strict=False)
+        self.framer = CachingRtuFramer(self.framer.decoder, self)
+        if hasattr(self.framer.decoder, 'register'):
+            # pymodbus 1.x cannot register responses, so it decodes as usual
+            self.framer.decoder.register(HoldingRegistersResponse)
+            self.framer.decoder.register(InputRegistersResponse)
         self.unit = Tracer.CHARGE_CONTROLLER_UNIT
+        self.low_latency = low_latency
         loginf("port: %s" % port)
+        # responses to register reads, keyed by (read, address, count)
+        self._reg_cache = dict()
+        self._cache_expiry = dict()
+        # spans the device rejected, as (read, address, count)
+        self._rejected_spans = set()
 
     def __enter__(self):
         return self
 
     def __exit__(self, _, value, traceback):
-        pass
+        self.close()
+
+    def connect(self):
+        # pymodbus calls connect before every request, so only set up the
+        # port when it is actually opened
+        if self.socket:
+            return True
+        if not super(Tracer, self).connect():
+            return False
+        if self.low_latency:
+            self._set_low_latency()
+        return True
+
+    def _set_low_latency(self):
+        # usb serial adapters hold received bytes for up to 16 ms, which
+        # delays every response.  ask the driver to pass them on right away.
+        try:
+            fd = self.socket.fileno()
+            buf = array.array('i', [0] * 32)
+            fcntl.ioctl(fd, Tracer.TIOCGSERIAL, buf)
+            buf[4] |= Tracer.ASYNC_LOW_LATENCY # serial_struct.flags
+            fcntl.ioctl(fd, Tracer.TIOCSSERIAL, buf)
+            logdbg("low latency mode enabled on %s", self.port)
+            return
+        except (AttributeError, ValueError, IOError, OSError) as e:
+            logdbg("cannot set low latency mode: %s", e)
+        # some adapters do not support the ioctl but expose the latency timer
+        name = os.path.basename(os.path.realpath(self.port))
+        path = '/sys/bus/usb-serial/devices/%s/latency_timer' % name
+        try:
+            with open(path, 'w') as f:
+                f.write('1')
+            logdbg("latency timer set to 1 ms for %s", self.port)
+        except (IOError, OSError) as e:
+            logdbg("cannot set latency timer: %s", e)
 
     def get_info(self):
-        basic = self.execute(ReadDeviceInformationRequest(
-            DeviceInformation.Basic, unit=self.unit))
+        # the regular objects include the basic objects, so one request is
+        # usually enough.  ask for the basic objects only if any are missing.
         regular = self.execute(ReadDeviceInformationRequest(
             DeviceInformation.Regular, unit=self.unit))
+        info = dict(regular.information)
+        if not all(i in info for i in (0, 1, 2)):
+            basic = self.execute(ReadDeviceInformationRequest(
+                DeviceInformation.Basic, unit=self.unit))
+            info.update(basic.information)
         return {
-            'company': basic.information[0],
-            'product': basic.information[1],
-            'version': basic.information[2],
-            'serial': regular.information[3],
+            'company': info[0],
+            'product': info[1],
+            'version': info[2],
+            'serial': info[3],
         }
 
-    def get_ratings(self):
+    def _read_holding(self, address, count):
+        return self._check(
+            self.read_holding_registers(address, count, unit=self.unit))
+
+    def _read_input(self, address, count):
+        return self._check(
+            self.read_input_registers(address, count, unit=self.unit))
+
+    def _read_coils(self, address, count):
+        return self._check(self.read_coils(address, count, unit=self.unit))
+
+    @staticmethod
+    def _check(r):
+        # pymodbus returns, rather than raises, the error for a timeout or a
+        # garbled response.  raise it so that the read can be retried.
+        if isinstance(r, ModbusIOException):
+            raise r
+        return r
+
+    def _read_blocks(self, blocks, data, read):
+        # read the blocks as one span, or one at a time if the span is too
+        # long or rejected.  failed blocks are noted in data and left out.
+        start = blocks[0][0]
+        count = blocks[-1][0] + blocks[-1][1] - start
+        regs = dict()
+        span = (read, start, count)
+        if (len(blocks) > 1 and count <= Tracer.MAX_READ_COUNT and
+            span not in self._rejected_spans):
+            r = read(start, count)
+            if r.function_code < 0x80:
+                for addr, n in blocks:
+                    regs[addr] = r.registers[addr - start:addr - start + n]
+                return regs
+            # the device will reject it every time, so do not ask again
+            self._rejected_spans.add(span)
+            logdbg("read of %s registers at 0x%04X rejected (%s),"
+                   " reading blocks", count, start, r)
+        for addr, n in blocks:
+            r = read(addr, n)
+            if r.function_code >= 0x80:
+                data['0x%04X' % addr] = 'read failed'
+            else:
+                regs[addr] = r.registers
+        return regs
+
+    def _read_schema(self, schema, read):
         data = dict()
-        r = self.read_input_registers(0x3000, 9, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x3000': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x3000': 'read failed'})
-        else:
-            data.update({
-                'rated_input_voltage': volts(r.registers[0]),
-                'rated_input_current': amps(r.registers[1]),
-                'rated_input_power': watts(r.registers[2], r.registers[3]),
-                'rated_output_voltage': volts(r.registers[4]),
-                'rated_output_current': amps(r.registers[5]),
-                'rated_output_power': watts(r.registers[6], r.registers[7]),
-                'charging_mode': r.registers[8],
-            })
-        r = self.read_input_registers(0x300E, 1, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x300E': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x300E': 'read failed'})
-        else:
-            data.update({
-                'rated_output_current_of_load': amps(r.registers[0]),
-            })
+        regs = self._read_blocks([(addr, count) for addr, count, _ in schema],
+                                 data, read)
+        for addr, _, plan in schema:
+            if addr in regs:
+                data.update(decode_block(plan, regs[addr]))
         return data
 
+    def get_ratings(self):
+        # the ratings are fixed in the hardware, so read them only once
+        return self._read_schema(RATINGS_SCHEMA, self._read_ratings)
+
+    def _read_ratings(self, address, count):
+        return self._cached_read(self._read_input, address, count, None)
+
     def get_statistics(self):
-        data = dict()
-        r = self.read_input_registers(0x3300, 31, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x3300': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x3300': 'read failed'})
-        else:
-            data.update({
-                'input_voltage_today_max': volts(r.registers[0]),
-                'input_voltage_today_min': volts(r.registers[1]),
-                'battery_voltage_today_max': volts(r.registers[2]),
-                'battery_voltage_today_min': volts(r.registers[3]),
-                'consumed_energy_today': kwh(r.registers[4], r.registers[5]),
-                'consumed_energy_month': kwh(r.registers[6], r.registers[7]),
-                'consumed_energy_year': kwh(r.registers[8], r.registers[9]),
-                'consumed_energy_total': kwh(r.registers[10], r.registers[11]),
-                'generated_energy_today': kwh(r.registers[12], r.registers[13]),
-                'generated_energy_month': kwh(r.registers[14], r.registers[15]),
-                'generated_energy_year': kwh(r.registers[16], r.registers[17]),
-                'generated_energy_total': kwh(r.registers[18], r.registers[19]),
-                'co2_reduction': tons(r.registers[20], r.registers[21]),
-                'battery_voltage': volts(r.registers[26]),
-                'battery_current': amps(r.registers[27], r.registers[28]),
-                'battery_temperature': temperature(r.registers[29]),
-                'ambient_temperature': temperature(r.registers[30]),
-            })
-        return data
+        return self._read_schema(STATISTICS_SCHEMA, self._read_input)
 
     def get_data(self):
-        data = dict()
-        r = self.read_input_registers(0x3100, 19, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x3100': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x3100': 'read failed'})
-        else:
-            data.update({
-                'charge_input_voltage': volts(r.registers[0]),
-                'charge_input_current': amps(r.registers[1]),
-                'charge_input_power': watts(r.registers[2], r.registers[3]),
-                'charge_output_voltage': volts(r.registers[4]),
-                'charge_output_current': amps(r.registers[5]),
-                'charge_output_power': watts(r.registers[6], r.registers[7]),
-                'discharge_output_voltage': volts(r.registers[12]),
-                'discharge_output_current': amps(r.registers[13]),
-                'discharge_output_power': watts(r.registers[14], r.registers[15]),
-                'battery_temperature': temperature(r.registers[16]),
-                'equipment_temperature': temperature(r.registers[17]),
-                'component_temperature': temperature(r.registers[18]),
-            })
-        r = self.read_input_registers(0x311A, 2, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x311A': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x311A': 'read failed'})
-        else:
-            data.update({
-                'battery_soc': percent(r.registers[0]),
-                'remote_battery_temperature': temperature(r.registers[1]),
-            })
-        r = self.read_input_registers(0x311D, 1, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x311D': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x311D': 'read failed'})
-        else:
-            data.update({
-                'battery_rated_power': volts(r.registers[0]),
-            })
-        return data
+        return self._read_schema(DATA_SCHEMA, self._read_input)
 
     def get_status(self):
-        data = dict()
-        r = self.read_input_registers(0x3200, 3, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x3200': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x3200': 'read failed'})
-        else:
-            r0 = r.registers[0]
-            r1 = r.registers[1]
-            r2 = r.registers[2]
-            data.update({
-                'status_battery_voltage': r0 & 0x0007,
-                'status_battery_temperature': (r0 >> 4) & 0x000f,
-                'status_battery_resistance': (r0 >> 8) & 0x0001,
-                'status_battery_rated_voltage': (r0 >> 15) & 0x0001,
-                'status_charge_input_voltage': (r1 >> 14) & 0x0003,
-                'status_charge_mosfet_short': (r1 >> 13) & 0x0001,
-                'status_charge_charging_or_anti_reverse_mosfet_short': (r1 >> 12) & 0x0001,
-                'status_charge_anti_reverse_mosfet_short': (r1 >> 11) & 0x0001,
-                'status_charge_input_over_current': (r1 >> 10) & 0x0001,
-                'status_charge_load_over_current': (r1 >> 9) & 0x0001,
-                'status_charge_load_short': (r1 >> 8) & 0x0001,
-                'status_charge_load_mosfet_short': (r1 >> 7) & 0x0001,
-                'status_charge_pv_input_short': (r1 >> 4) & 0x0001,
-                'status_charge_battery': (r1 >> 2) & 0x0003,
-                'status_charge_fault': (r1 >> 1) & 0x0001,
-                'status_charge_running': r1 & 0x0001,
-                'status_discharge_input_voltage': (r2 >> 14) & 0x003,
-                'status_discharge_output_power': (r2 >> 12) & 0x0003,
-                'status_discharge_short_circuit': (r2 >> 11) & 0x0001,
-                'status_discharge_unable_to_discharge': (r2 >> 10) & 0x0001,
-                'status_discharge_unable_to_stop_discharge': (r2 >> 9) & 0x0001,
-                'status_discharge_output_voltage_abnormal': (r2 >> 8) & 0x0001,
-                'status_discharge_input_overpressure': (r2 >> 7) & 0x0001,
-                'status_discharge_high_voltage_side_short': (r2 >> 6) & 0x0001,
-                'status_discharge_boost_overpressure': (r2 >> 5) & 0x0001,
-                'status_discharge_output_overpressure': (r2 >> 4) & 0x0001,
-                'status_discharge_fault': (r2 >> 1) & 0x0001,
-                'status_discharge_running': r2 & 0x001,
-            })
-        return data
+        r = self._read_input(0x3200, 3)
+        if r.function_code >= 0x80:
+            return {'0x3200': 'read failed'}
+        regs = r.registers
+        return dict(zip(STATUS_NAMES, [(regs[i] >> shift) & mask
+                                       for i, shift, mask in STATUS_BITS]))
 
     def get_coils(self):
-        mapping = [
-            (2, 1, ['manual_load_control', 0]),
-            (3, 1, ['default_load_control', 0]),
-            (5, 1, ['load_test_mode', 0]),
-            (6, 1, ['force_loa', 0]),
-        ]
+        r = self._read_coils(2, 5)
+        if r.function_code < 0x80:
+            return decode_coils(2, 5, r.bits)
+        # the device might reject a read that includes the unused coil 4, so
+        # read the coils on either side of it separately
         data = dict()
-        for m in mapping:
-            r = self.read_coils(m[0], m[1], unit=self.unit)
-            if isinstance(r, Exception):
-                data.update({'coil%s' % m[0]: "exception: %s" % r})
-            elif r.function_code >= 0x80:
-                data.update({'coil%s' % m[0]: 'read failed'})
+        for start in (2, 5):
+            r = self._read_coils(start, 2)
+            if r.function_code >= 0x80:
+                data['coil%s' % start] = 'read failed'
             else:
-                data.update({m[2][0]: r.bits[m[2][1]]})
+                data.update(decode_coils(start, 2, r.bits))
         return data
 
-    def get_settings(self):
-        data = dict()
-
-        # registers 0x9000 - 0x9014
-        r = self.read_holding_registers(0x9000, 15, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9000': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9000': 'read failed'})
-        else:
-            data.update({
-                'battery_type': battery_type(r.registers[0]),
-                'battery_capacity': amp_hours(r.registers[1]),
-                'temperature_compensation_coefficient': coeff(r.registers[2]),
-                'high_voltage_disconnect': volts(r.registers[3]),
-                'charging_limit_voltage': volts(r.registers[4]),
-                'over_voltage_reconnect': volts(r.registers[5]),
-                'equalization_voltage': volts(r.registers[6]),
-                'boost_voltage': volts(r.registers[7]),
-                'float_voltage': volts(r.registers[8]),
-                'boost_reconnect_voltage': volts(r.registers[9]),
-                'low_voltage_reconnect': volts(r.registers[10]),
-                'under_voltage_recover': volts(r.registers[11]),
-                'under_voltage_warning': volts(r.registers[12]),
-                'low_voltage_disconnect': volts(r.registers[13]),
-                'discharging_limit_voltage': volts(r.registers[14]),
-            })
-
-        # registers 0x9013 - 0x9021
-        r = self.read_holding_registers(0x9013, 15, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9013': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9013': 'read failed'})
-        else:
-            data.update({
-                'clock': to_datetime(r.registers[0], r.registers[1], r.registers[2]),
-                'equalization_charging_cycle': days(r.registers[3]),
-                'battery_temperature_warning_upper_limit': temperature(r.registers[4]),
-                'battery_temperature_warning_lower_limit': temperature(r.registers[5]),
-                'controller_inner_temperature_upper_limit': temperature(r.registers[6]),
-                'controller_inner_temperature_upper_limit_recover': temperature(r.registers[7]),
-                'power_component_temperature_upper_limit': temperature(r.registers[8]),
-                'power_component_temperature_upper_limit_recover': temperature(r.registers[9]),
-                'line_impedance': milliohms(r.registers[10]),
-                'night_time_threshold_volt': volts(r.registers[11]),
-                'light_signal_startup_delay_time': minutes(r.registers[12]),
-                'day_time_threshold_volt': volts(r.registers[13]),
-                'light_signal_turn_off_delay_time': minutes(r.registers[14]),
-            })
-
-        # registers 0x903D - 0x903F
-        r = self.read_holding_registers(0x903D, 3, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x903D': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x903D': 'read failed'})
-        else:
-            data.update({
-                'load_controlling_modes': load_controlling_mode(r.registers[0]),
-                'working_time_length_1': hour_minute(r.registers[1]),
-                'working_time_length_2': hour_minute(r.registers[2]),
-            })
-
-        # registers 0x9042 - 0x904D
-        r = self.read_holding_registers(0x9042, 12, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9042': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9042': 'read failed'})
+    def write_register(self, address, value, **kwargs):
+        self._invalidate_cache(address, 1)
+        return super(Tracer, self).write_register(address, value, **kwargs)
+
+    def write_registers(self, address, values, **kwargs):
+        self._invalidate_cache(address, len(values))
+        return super(Tracer, self).write_registers(address, values, **kwargs)
+
+    def invalidate_settings(self):
+        # the next get_settings or get_ratings reads from the device
+        self._reg_cache.clear()
+        self._cache_expiry.clear()
+
+    def _invalidate_cache(self, address, count):
+        # only holding registers can be written
+        for key in list(self._reg_cache.keys()):
+            if (key[0] == self._read_holding and
+                key[1] < address + count and address < key[1] + key[2]):
+                del self._reg_cache[key]
+                del self._cache_expiry[key]
+
+    def _cached_read(self, read, address, count, ttl):
+        # reuse a successful response for ttl seconds.  a ttl of 0 never
+        # caches, a ttl of None caches until the cache is invalidated.
+        key = (read, address, count)
+        if ttl != 0 and monotonic() < self._cache_expiry.get(key, 0):
+            return self._reg_cache[key]
+        r = read(address, count)
+        if ttl == 0 or r.function_code >= 0x80:
+            return r
+        self._reg_cache[key] = r
+        if ttl is None:
+            self._cache_expiry[key] = float('inf')
         else:
-            data.update({
-                'turn_on_timing_1': to_time(r.registers[0], r.registers[1], r.registers[2]),
-                'turn_off_timing_1': to_time(r.registers[3], r.registers[4], r.registers[5]),
-                'turn_on_timing_2': to_time(r.registers[6], r.registers[7], r.registers[8]),
-                'turn_off_timing_2': to_time(r.registers[9], r.registers[10], r.registers[11]),
-            })
-
-        # registers 0x9063
-        r = self.read_holding_registers(0x9063, 1, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9063': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9063': 'read failed'})
-        else:
-            data.update({
-                'backlight_time': seconds(r.registers[0]),
-            })
-
-        # registers 0x9065
-        r = self.read_holding_registers(0x9065, 1, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9065': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9065': 'read failed'})
-        else:
-            data.update({
-                'length_of_night': hour_minute(r.registers[0]),
-            })
-
-        # registers 0x9067 - 0x906E
-        r = self.read_holding_registers(0x9067, 8, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9067': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9067': 'read failed'})
-        else:
-            data.update({
-                'battery_rated_voltage_code': voltage_code(r.registers[0]),
-                'load_timing_control_selection': load_timing_control(r.registers[2]),
-                'default_load_onoff_in_manual_mode': on_off(r.registers[3]),
-                'equalize_duration': minutes(r.registers[4]),
-                'boost_duration': minutes(r.registers[5]),
-                'discharge_percentage': percent(r.registers[6]),
-                'charging_percentage': percent(r.registers[7]),
-            })
-
-        # registers 0x9070
-        r = self.read_holding_registers(0x9070, 1, unit=self.unit)
-        if isinstance(r, Exception):
-            data.update({'0x9070': "exception: %s" % r})
-        elif r.function_code >= 0x80:
-            data.update({'0x9070': 'read failed'})
-        else:
-            data.update({
-                'management_modes': management_mode(r.registers[0]),
-            })
+            self._cache_expiry[key] = monotonic() + ttl
+        return r
 
-        return data
+    def get_settings(self):
+        # the settings are cached, so the clock is as of the last actual read
+        return self._read_schema(SETTINGS_SCHEMA, self._read_settings)
+
+    def _read_settings(self, address, count):
+        return self._cached_read(self._read_holding, address, count,
+                                 Tracer.SETTINGS_CACHE_TTL)
 
 
 if __name__ == '__main__':
@@ -606,6 +905,17 @@ if __name__ == '__main__':
 
     usage = """%prog [options] [--debug] [--help]"""
 
+    # report sections, as (name, title, method)
+    SECTIONS = (
+        ('info', 'device info', 'get_info'),
+        ('ratings', 'device ratings', 'get_ratings'),
+        ('settings', 'device settings', 'get_settings'),
+        ('status', 'status', 'get_status'),
+        ('data', 'data', 'get_data'),
+        ('coils', 'coils', 'get_coils'),
+        ('statistics', 'statistics', 'get_statistics'),
+    )
+
     def pretty_print(x, level=0):
         for k in sorted(x.keys()):
             print("%s%s=%s" % (' ' * level, k, x[k]))
@@ -624,9 +934,17 @@ if __name__ == '__main__':
                           help='modbus slave baud rate', type=int,
                           default=Tracer.DEFAULT_BAUD_RATE)
         parser.add_option('--timeout', dest='timeout', metavar='TIMEOUT',
-                          help='modbus timeout, in seconds', type=int,
+                          help='modbus timeout, in seconds', type=float,
                           default=Tracer.DEFAULT_TIMEOUT)
+        parser.add_option('--show', dest='show', metavar='SECTIONS',
+                          help='comma-separated list of sections to display:'
+                          ' %s' % ','.join(x[0] for x in SECTIONS),
+                          default=','.join(x[0] for x in SECTIONS))
         (options, _) = parser.parse_args()
+        show = set(x.strip() for x in options.show.split(','))
+        unknown = show.difference(x[0] for x in SECTIONS)
+        if unknown:
+            parser.error("unknown sections: %s" % ','.join(sorted(unknown)))
 
         if options.version:
             print "driver version %s" % DRIVER_VERSION
@@ -638,26 +956,14 @@ if __name__ == '__main__':
             syslog.setlogmask(syslog.LOG_UPTO(syslog.LOG_INFO))
 
         with Tracer(options.port, options.baud_rate, options.timeout) as station:
-            print("device info:")
-            data = station.get_info()
-            pretty_print(data, 2)
-            print("device ratings:")
-            data = station.get_ratings()
-            pretty_print(data, 2)
-            print("device settings:")
-            data = station.get_settings()
-            pretty_print(data, 2)
-            print("status:")
-            data = station.get_status()
-            pretty_print(data, 2)
-            print("data:")
-            data = station.get_data()
-            pretty_print(data, 2)
-            print("coils:")
-            data = station.get_coils()
-            pretty_print(data, 2)
-            print("statistics:")
-            data = station.get_statistics()
-            pretty_print(data, 2)
+            for name, title, method in SECTIONS:
+                if name in show:
+                    print("%s:" % title)
+                    try:
+                        data = getattr(station, method)()
+                    except ModbusIOException as e:
+                        # show what failed and go on to the next section
+                        data = {'error': "exception: %s" % e}
+                    pretty_print(data, 2)
 
     main()